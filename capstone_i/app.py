@@ -1,7 +1,9 @@
 import streamlit as st
 from utils.logger_helper import get_logger
 from utils.tools.agent import MODEL, run_agent_conversation
-from utils.db_helper import ask_database
+from utils.db_helper import DB_BACKEND, ask_database
+from utils.materialize_helper import get_refresh_status
+from utils.singleflight_helper import get_singleflight_stats
 
 
 logger = get_logger("genai_capstone_app")
@@ -61,6 +63,18 @@ with st.sidebar:
         st.error("Unable to load database stats")
         logger.error(f"Stats error: {e}")
 
+    if DB_BACKEND == "duckdb":
+        st.caption("Serving queries from the in-process DuckDB catalog")
+    else:
+        try:
+            refresh_status = get_refresh_status()
+            if refresh_status:
+                last_refresh = min(row[2] for row in refresh_status)
+                st.caption(f"Summary tables refreshed: {last_refresh:%Y-%m-%d %H:%M} UTC")
+        except Exception as e:
+            st.caption("Summary tables not materialized yet")
+            logger.warning(f"Summary status error: {e}")
+
     st.divider()
 
 if "messages" not in st.session_state:
@@ -70,6 +84,8 @@ if "messages" not in st.session_state:
 
 st.sidebar.title("⚙️ Settings")
 st.sidebar.markdown(f"Using internal model: **{MODEL or 'not set'}**")
+for name, stats in get_singleflight_stats().items():
+    st.sidebar.caption(f"{name}: {stats['coalesced']} of {stats['calls']} calls coalesced")
 
 # Main chat interface
 st.title("🍷 Wine Database Chat Assistant")
@@ -1,7 +1,9 @@
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv, find_dotenv
 from .logger_helper import get_logger
+from .singleflight_helper import get_flight
 import os
+import re
 
 env_file = find_dotenv()
 load_dotenv(env_file)
@@ -9,10 +11,36 @@ load_dotenv(env_file)
 logger = get_logger("db_helper")
 
 DATABASE_URL = os.getenv('DATABASE_URL')
+DB_BACKEND = os.getenv('DB_BACKEND', 'mysql').lower()  # "mysql" or "duckdb"
+
+db_flight = get_flight("ask_database")
+
+# Raw tables are capped at 10 rows; the small precomputed summary tables
+# (see utils.materialize_helper) get more so distributions are not cut off
+ROW_LIMIT = 10
+SUMMARY_ROW_LIMIT = 100
+SUMMARY_TABLE_RE = re.compile(r"\bwine_\w+_(summary|histogram)\b", re.IGNORECASE)
 
 def ask_database(query):
 
-    safe_query = f"SELECT * FROM ({query.rstrip(';')}) AS subquery LIMIT 10"
+    limit = SUMMARY_ROW_LIMIT if SUMMARY_TABLE_RE.search(query) else ROW_LIMIT
+    safe_query = f"SELECT * FROM ({query.strip().rstrip(';')}) AS subquery LIMIT {limit}"
+
+    # Identical queries from concurrent sessions share one execution
+    return db_flight.do(safe_query, _execute, safe_query)
+
+def _execute(safe_query):
+
+    if DB_BACKEND == "duckdb":
+        from .duckdb_helper import query_catalog
+        try:
+            logger.info("Executing SAFE query (duckdb): %s", safe_query)
+            results = query_catalog(safe_query)
+            logger.info("Query results: %s", results)
+            return results
+        except Exception as e:
+            logger.exception("SQL error while executing query")
+            raise Exception(f"SQL error: {e}") from e
 
     db_conn = create_engine(DATABASE_URL)
     try:
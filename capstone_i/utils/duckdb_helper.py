@@ -0,0 +1,228 @@
+"""
+In-process DuckDB copy of the wine catalog.
+
+The catalog is small and read-only, so instead of a MySQL round trip per agent
+query it can be loaded once per process into an embedded DuckDB database with
+typed columns. Enabled with `DB_BACKEND=duckdb`; `ask_database` then runs the
+agent's read-only SQL here. MySQL quoting and LIKE are translated to DuckDB,
+and strings compare case- and accent-insensitively like MySQL's default
+collation. The agent is given `SCHEMA_STRING` and `DIALECT_HINT` so it writes
+SQL for the typed columns.
+
+The catalog is loaded either from `dump_for_restore.sql` (default) or from a
+live MySQL snapshot (`DUCKDB_SOURCE=mysql`), so MySQL is only needed to refresh.
+Every thread gets its own cursor on the shared in-memory database.
+"""
+import os
+import re
+import threading
+
+import duckdb
+import pandas as pd
+from sqlalchemy import create_engine
+from .db_helper import DATABASE_URL
+from .logger_helper import get_logger
+from .materialize_helper import (
+    AGGREGATE_COLUMNS,
+    AGGREGATE_TABLES,
+    HISTOGRAM_COLUMNS,
+    HISTOGRAM_KEYS,
+    HISTOGRAM_TABLE,
+    aggregate_select,
+    key_filter,
+    key_group,
+    key_select,
+    rating_bucket,
+)
+
+logger = get_logger("duckdb_helper")
+
+DUCKDB_SOURCE = os.getenv("DUCKDB_SOURCE", "dump").lower()
+DUMP_PATH = os.getenv(
+    "DUMP_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "dump_for_restore.sql"),
+)
+
+WINE_TABLES = ["red", "white", "rose", "sparkling"]
+WINE_COLUMNS = ["Name", "Country", "Region", "Winery", "Rating", "NumberOfRatings", "Price", "Year"]
+VARIETIES_TABLE = "varieties"
+
+SCHEMA_STRING = "\n".join(
+    f"Table: {table} Columns: Name, Country, Region, Winery, Rating (DOUBLE), "
+    f"NumberOfRatings (INTEGER), Price (DOUBLE), Year (text, 'N.V.' for non-vintage)"
+    for table in ["Red", "Rose", "Sparkling", "White"]
+) + "\nTable: Varieties Columns: C1"
+
+DIALECT_HINT = (
+    "The database is DuckDB. Rating, Price and NumberOfRatings are numeric columns: compare and "
+    "aggregate them directly, without CAST or string functions such as REPLACE. "
+    "Quote string literals with single quotes and never double-quote identifiers; "
+    "string comparisons are case-insensitive. "
+)
+
+_INSERT_RE = re.compile(r"^INSERT INTO `(\w+)` VALUES (.*);$")
+_VALUE_RE = re.compile(r"'((?:[^'\\]|\\.)*)'|(NULL)|([-+0-9.eE]+)|(\()|(\))")
+_UNESCAPE = {"0": "\0", "n": "\n", "r": "\r", "t": "\t", "Z": "\x1a"}
+# MySQL string literals, backtick identifiers and LIKE, in query text
+_QUERY_TOKEN_RE = re.compile(
+    r"'((?:[^'\\]|\\.|'')*)'|\"((?:[^\"\\]|\\.|\"\")*)\"|`([^`]*)`|\bLIKE\b",
+    re.IGNORECASE,
+)
+
+_ALIAS_RE = re.compile(r'\bAS\s+"((?:[^"]|"")+)"', re.IGNORECASE)
+# Column names of the catalog and summary tables
+_COLUMNS = {column.lower() for column in WINE_COLUMNS + AGGREGATE_COLUMNS + HISTOGRAM_COLUMNS + ["Type", "C1"]}
+
+_lock = threading.RLock()
+_connection = None
+_local = threading.local()
+
+
+def _unescape(value):
+    return re.sub(r"\\(.)", lambda m: _UNESCAPE.get(m.group(1), m.group(1)), value)
+
+
+def _to_duckdb(query):
+    """Translate MySQL quoting and LIKE to DuckDB without touching string contents.
+
+    Single quoted strings become standard literals, as do double quoted ones
+    unless they name a column or an alias defined in the query (MySQL accepts
+    `AS "avg_price" ... ORDER BY "avg_price"`). Backtick identifiers become
+    double quoted ones and LIKE becomes ILIKE, as MySQL's default collation
+    matches case-insensitively.
+    """
+    identifiers = _COLUMNS | {alias.replace('""', '"').lower() for alias in _ALIAS_RE.findall(query)}
+
+    def translate(match):
+        single, double, identifier = match.groups()
+        if single is not None:
+            return "'" + _unescape(single.replace("''", "'")).replace("'", "''") + "'"
+        if double is not None and double.replace('""', '"').lower() in identifiers:
+            return '"' + double + '"'
+        if double is not None:
+            return "'" + _unescape(double.replace('""', '"')).replace("'", "''") + "'"
+        if identifier is not None:
+            return '"' + identifier.replace('"', '""') + '"'
+        return "ILIKE"
+
+    return _QUERY_TOKEN_RE.sub(translate, query)
+
+
+def _parse_rows(values):
+    """Parse the VALUES part of a mysqldump INSERT statement into tuples."""
+    rows, row = [], None
+    for quoted, null, number, opening, closing in _VALUE_RE.findall(values):
+        if opening:
+            row = []
+        elif closing:
+            rows.append(tuple(row))
+        elif null:
+            row.append(None)
+        elif number:
+            row.append(number)
+        else:
+            row.append(_unescape(quoted))
+    return rows
+
+
+def _load_from_dump(path):
+    frames = {}
+    with open(path, encoding="utf-8") as dump:
+        for line in dump:
+            match = _INSERT_RE.match(line.rstrip("\n"))
+            if not match:
+                continue
+            table = match.group(1).lower()
+            columns = WINE_COLUMNS if table in WINE_TABLES else ["C1"]
+            frame = pd.DataFrame(_parse_rows(match.group(2)), columns=columns)
+            frames[table] = pd.concat([frames[table], frame]) if table in frames else frame
+    return frames
+
+
+def _load_from_mysql():
+    db_conn = create_engine(DATABASE_URL)
+    with db_conn.connect() as conn:
+        return {
+            table: pd.read_sql(f"SELECT * FROM {table}", conn).astype("string")
+            for table in WINE_TABLES + [VARIETIES_TABLE]
+        }
+
+
+def _number(column, sql_type="DOUBLE"):
+    return f"TRY_CAST(NULLIF(TRIM({column}), '') AS {sql_type})"
+
+
+def _typed(column):
+    """Columns are already typed here, unlike the raw MySQL text columns."""
+    return column
+
+
+def _build_catalog(frames):
+    """Create typed catalog tables and the summary tables in a fresh database."""
+    con = duckdb.connect(":memory:")
+    # Match MySQL's utf8mb4_0900_ai_ci: case- and accent-insensitive comparisons
+    con.execute("SET default_collation = 'nocase.noaccent'")
+    for table in WINE_TABLES:
+        con.register("staging", frames[table])
+        con.execute(
+            f"CREATE TABLE {table} AS SELECT Name, Country, Region, Winery, "
+            f"{_number('Rating')} AS Rating, {_number('NumberOfRatings', 'INTEGER')} AS NumberOfRatings, "
+            f"{_number('Price')} AS Price, TRIM(Year) AS Year FROM staging"
+        )
+        con.unregister("staging")
+
+    con.register("staging", frames[VARIETIES_TABLE])
+    con.execute(f"CREATE TABLE {VARIETIES_TABLE} AS SELECT C1 FROM staging")
+    con.unregister("staging")
+
+    # Same summary tables as utils.materialize_helper, so the agent schema stays valid
+    all_wines = " UNION ALL ".join(f"SELECT '{table}' AS Type, * FROM {table}" for table in WINE_TABLES)
+    for name, keys in AGGREGATE_TABLES.items():
+        con.execute(
+            f"CREATE TABLE {name} AS SELECT Type, {key_select(keys)}, {aggregate_select(_typed)} "
+            f"FROM ({all_wines}) WHERE {key_filter(keys)} "
+            f"GROUP BY Type, {key_group(keys)}"
+        )
+    bucket = rating_bucket(_typed)
+    con.execute(
+        f"CREATE TABLE {HISTOGRAM_TABLE} AS SELECT Type, {key_select(HISTOGRAM_KEYS)}, "
+        f"{bucket} AS RatingBucket, COUNT(*) AS Wines "
+        f"FROM ({all_wines}) WHERE Rating IS NOT NULL AND {key_filter(HISTOGRAM_KEYS)} "
+        f"GROUP BY Type, {key_group(HISTOGRAM_KEYS)}, {bucket}"
+    )
+    return con
+
+
+def refresh_catalog():
+    """(Re)load the catalog from the configured source and swap it in."""
+    global _connection
+    logger.info("Loading DuckDB catalog from %s", DUMP_PATH if DUCKDB_SOURCE == "dump" else "MySQL")
+    frames = _load_from_mysql() if DUCKDB_SOURCE == "mysql" else _load_from_dump(DUMP_PATH)
+    with _lock:
+        previous, _connection = _connection, _build_catalog(frames)
+    if previous is not None:
+        # Threads still holding cursors on it switch over on their next query
+        previous.close()
+    logger.info("DuckDB catalog loaded: %s", {table: len(frame) for table, frame in frames.items()})
+    return _connection
+
+
+def _cursor():
+    """Return this thread's cursor, loading the catalog on first use."""
+    if _connection is None:
+        with _lock:
+            if _connection is None:
+                refresh_catalog()
+
+    connection = _connection
+    if getattr(_local, "source", None) is not connection:
+        if getattr(_local, "cursor", None) is not None:
+            _local.cursor.close()
+        _local.cursor = connection.cursor()
+        _local.source = connection
+    return _local.cursor
+
+
+def query_catalog(query):
+    """Run a read-only query against the in-process catalog and return all rows."""
+    return _cursor().execute(_to_duckdb(query)).fetchall()
@@ -0,0 +1,222 @@
+"""
+Precomputed aggregate tables for the wine database.
+
+The raw `red`, `white`, `rose` and `sparkling` tables store most numbers as
+text, so every aggregate question (average price by country, rating
+distribution per region, ...) makes the agent cast and GROUP BY the full
+tables. This module materializes those aggregates into small summary tables
+that the agent can query directly.
+
+Freshness is tracked per source table in `wine_summary_refresh`. A refresh
+compares the current row count and checksum of each source table with the
+recorded ones and only rebuilds the summary rows of the wine types that
+changed, so running it after every load is cheap.
+
+Usage (from the capstone_i directory):
+    python -m utils.materialize_helper          # incremental refresh
+    python -m utils.materialize_helper --full   # rebuild all summaries
+"""
+import argparse
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine, text
+from .db_helper import DATABASE_URL
+from .logger_helper import get_logger
+
+logger = get_logger("materialize_helper")
+
+# Wine type label -> raw source table
+SOURCE_TABLES = {
+    "red": "red",
+    "white": "white",
+    "rose": "rose",
+    "sparkling": "sparkling",
+}
+
+REFRESH_TABLE = "wine_summary_refresh"
+
+# Summary table -> grouping columns of the raw tables
+AGGREGATE_TABLES = {
+    "wine_country_summary": ["Country"],
+    "wine_region_summary": ["Country", "Region"],
+    "wine_winery_summary": ["Country", "Winery"],
+    "wine_year_summary": ["Year"],
+}
+
+HISTOGRAM_TABLE = "wine_rating_histogram"
+HISTOGRAM_KEYS = ["Country", "Region"]
+
+AGGREGATE_COLUMNS = ["Wines", "AvgPrice", "MinPrice", "MaxPrice", "AvgRating", "TotalRatings"]
+HISTOGRAM_COLUMNS = ["RatingBucket", "Wines"]
+
+SUMMARY_SCHEMA_STRING = "\n".join(
+    [
+        f"Table: {name} Columns: Type, {', '.join(keys + AGGREGATE_COLUMNS)}"
+        for name, keys in AGGREGATE_TABLES.items()
+    ]
+    + [f"Table: {HISTOGRAM_TABLE} Columns: Type, {', '.join(HISTOGRAM_KEYS + HISTOGRAM_COLUMNS)}"]
+)
+
+
+def _number(column):
+    """SQL expression casting a text column to a number, NULL when not numeric."""
+    return (
+        f"CASE WHEN TRIM({column}) REGEXP '^[0-9]+([.][0-9]+)?$' "
+        f"THEN CAST(TRIM({column}) AS DECIMAL(10,2)) END"
+    )
+
+
+# The SQL below is shared with utils.duckdb_helper, so both backends trim,
+# filter and round the summary rows the same way. `number` maps a raw column
+# name to a numeric SQL expression in the respective backend.
+
+def key_select(keys):
+    return ", ".join(f"TRIM({key}) AS {key}" for key in keys)
+
+
+def key_group(keys):
+    return ", ".join(f"TRIM({key})" for key in keys)
+
+
+def key_filter(keys):
+    return " AND ".join(f"NULLIF(TRIM({key}), '') IS NOT NULL" for key in keys)
+
+
+def aggregate_select(number):
+    return (
+        f"COUNT(*) AS Wines, "
+        f"CAST(AVG({number('Price')}) AS DECIMAL(10,2)) AS AvgPrice, "
+        f"CAST(MIN({number('Price')}) AS DECIMAL(10,2)) AS MinPrice, "
+        f"CAST(MAX({number('Price')}) AS DECIMAL(10,2)) AS MaxPrice, "
+        f"CAST(AVG({number('Rating')}) AS DECIMAL(3,2)) AS AvgRating, "
+        f"CAST(SUM({number('NumberOfRatings')}) AS DECIMAL(18,0)) AS TotalRatings"
+    )
+
+
+def rating_bucket(number):
+    return f"CAST(FLOOR({number('Rating')} * 2) / 2 AS DECIMAL(2,1))"
+
+
+def _create_tables(conn):
+    for name, keys in AGGREGATE_TABLES.items():
+        key_columns = ", ".join(f"{key} VARCHAR(255)" for key in keys)
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} ("
+            f"Type VARCHAR(16), {key_columns}, Wines INT, "
+            f"AvgPrice DECIMAL(10,2), MinPrice DECIMAL(10,2), MaxPrice DECIMAL(10,2), "
+            f"AvgRating DECIMAL(3,2), TotalRatings BIGINT)"
+        ))
+
+    key_columns = ", ".join(f"{key} VARCHAR(255)" for key in HISTOGRAM_KEYS)
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {HISTOGRAM_TABLE} ("
+        f"Type VARCHAR(16), {key_columns}, RatingBucket DECIMAL(2,1), Wines INT)"
+    ))
+
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {REFRESH_TABLE} ("
+        f"SourceTable VARCHAR(32) PRIMARY KEY, SourceRows INT, "
+        f"SourceChecksum BIGINT, RefreshedAt DATETIME)"
+    ))
+
+
+def _source_state(conn, table):
+    rows = conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+    checksum = conn.execute(text(f"CHECKSUM TABLE {table}")).fetchone()[1]
+    return rows, checksum
+
+
+def _rebuild_type(conn, wine_type, table):
+    """Replace the summary rows of one wine type with fresh aggregates."""
+    for name, keys in AGGREGATE_TABLES.items():
+        conn.execute(text(f"DELETE FROM {name} WHERE Type = :type"), {"type": wine_type})
+        conn.execute(text(
+            f"INSERT INTO {name} (Type, {', '.join(keys + AGGREGATE_COLUMNS)}) "
+            f"SELECT :type, {key_select(keys)}, {aggregate_select(_number)} "
+            f"FROM {table} WHERE {key_filter(keys)} GROUP BY {key_group(keys)}"
+        ), {"type": wine_type})
+
+    bucket = rating_bucket(_number)
+    conn.execute(text(f"DELETE FROM {HISTOGRAM_TABLE} WHERE Type = :type"), {"type": wine_type})
+    conn.execute(text(
+        f"INSERT INTO {HISTOGRAM_TABLE} (Type, {', '.join(HISTOGRAM_KEYS + HISTOGRAM_COLUMNS)}) "
+        f"SELECT :type, {key_select(HISTOGRAM_KEYS)}, {bucket} AS RatingBucket, COUNT(*) AS Wines "
+        f"FROM {table} WHERE {key_filter(HISTOGRAM_KEYS)} AND {_number('Rating')} IS NOT NULL "
+        f"GROUP BY {key_group(HISTOGRAM_KEYS)}, {bucket}"
+    ), {"type": wine_type})
+
+
+def refresh_summaries(full=False):
+    """Build or refresh the summary tables.
+
+    Only wine types whose source table changed since the last refresh are
+    rebuilt, unless `full` is set. Returns the list of refreshed wine types.
+    """
+    db_conn = create_engine(DATABASE_URL)
+    refreshed = []
+    try:
+        with db_conn.begin() as conn:
+            _create_tables(conn)
+            known = {
+                row[0]: (row[1], row[2])
+                for row in conn.execute(
+                    text(f"SELECT SourceTable, SourceRows, SourceChecksum FROM {REFRESH_TABLE}")
+                )
+            }
+
+        for wine_type, table in SOURCE_TABLES.items():
+            with db_conn.begin() as conn:
+                state = _source_state(conn, table)
+                if not full and known.get(table) == state:
+                    logger.info("Summaries for %s are up to date (%s rows)", wine_type, state[0])
+                    continue
+
+                logger.info("Refreshing summaries for %s (%s rows)", wine_type, state[0])
+                _rebuild_type(conn, wine_type, table)
+                conn.execute(text(f"DELETE FROM {REFRESH_TABLE} WHERE SourceTable = :table"), {"table": table})
+                conn.execute(
+                    text(
+                        f"INSERT INTO {REFRESH_TABLE} (SourceTable, SourceRows, SourceChecksum, RefreshedAt) "
+                        f"VALUES (:table, :rows, :checksum, :refreshed_at)"
+                    ),
+                    {
+                        "table": table,
+                        "rows": state[0],
+                        "checksum": state[1],
+                        "refreshed_at": datetime.now(timezone.utc).replace(tzinfo=None),
+                    },
+                )
+                refreshed.append(wine_type)
+    except Exception as e:
+        logger.exception("Summary refresh failed")
+        raise Exception(f"SUMMARY_REFRESH_ERROR: {e}") from e
+
+    logger.info("Summary refresh finished, rebuilt: %s", refreshed or "nothing")
+    return refreshed
+
+
+def get_refresh_status():
+    """Return (source table, rows, refreshed at UTC) for every materialized source."""
+    db_conn = create_engine(DATABASE_URL)
+    with db_conn.connect() as conn:
+        return conn.execute(
+            text(f"SELECT SourceTable, SourceRows, RefreshedAt FROM {REFRESH_TABLE} ORDER BY SourceTable")
+        ).fetchall()
+
+
+def summaries_materialized():
+    """Return whether the summary tables have been built, without touching them.
+
+    Building and refreshing is left to the `python -m utils.materialize_helper` job.
+    """
+    try:
+        return bool(get_refresh_status())
+    except Exception as e:
+        logger.warning("Summary tables unavailable, agent will query raw tables: %s", e)
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh precomputed wine summary tables.")
+    parser.add_argument("--full", action="store_true", help="rebuild all summaries, even if unchanged")
+    refresh_summaries(full=parser.parse_args().full)
@@ -3,8 +3,10 @@ import os
 from openai import OpenAI
 from dotenv import find_dotenv, load_dotenv
 from ..logger_helper import get_logger
-from ..db_helper import ask_database
+from ..db_helper import DB_BACKEND, ROW_LIMIT, SUMMARY_ROW_LIMIT, ask_database
+from ..materialize_helper import SUMMARY_SCHEMA_STRING, summaries_materialized
 from ..github_helper import create_support_ticket
+from ..singleflight_helper import get_flight
 
 logger = get_logger("agent")
 env_file = find_dotenv()
@@ -13,17 +15,40 @@ load_dotenv(env_file)
 client = OpenAI()
 MODEL = os.getenv("MODEL")
 
+agent_flight = get_flight("run_agent_conversation")
+
+# The DuckDB catalog always builds the summary tables; in MySQL only if the job has run
+summaries_available = DB_BACKEND == "duckdb" or summaries_materialized()
+
 database_schema_string = """Table: Red Columns: Name, Country, Region, Winery, Rating, NumberOfRatings, Price, Year 
 Table: Rose Columns: Name, Country, Region, Winery, Rating, NumberOfRatings, Price, Year 
 Table: Sparkling Columns: Name, Country, Region, Winery, Rating, NumberOfRatings, Price, Year 
 Table: Varieties Columns: C1 
 Table: White Columns: Name, Country, Region, Winery, Rating, NumberOfRatings, Price, Year"""
+dialect_hint = ""
+
+if DB_BACKEND == "duckdb":
+    from ..duckdb_helper import DIALECT_HINT, SCHEMA_STRING
+    database_schema_string = SCHEMA_STRING
+    dialect_hint = DIALECT_HINT
+
+summary_hint = ""
+if summaries_available:
+    database_schema_string += "\n" + SUMMARY_SCHEMA_STRING
+    summary_hint = (
+        "The *_summary and wine_rating_histogram tables are precomputed aggregates per wine Type "
+        "(red, white, rose, sparkling); prefer them for averages, counts and rating distributions "
+        "by country, region, winery or year instead of grouping the raw tables. "
+        f"Queries on them return at most {SUMMARY_ROW_LIMIT} rows (raw tables {ROW_LIMIT}), so filter "
+        "by Type, Country or Region and use ORDER BY ... LIMIT for rankings. "
+    )
 
 instructions = (
     "You are an AI assistant that helps users by answering questions about wines "
     "from a SQL database. You can also create support tickets on GitHub for technical issues. "
     "Never modify data — do not use DELETE, INSERT, UPDATE, DROP, or ALTER. "
     "Only use SELECT statements when accessing the database. "
+    + dialect_hint + summary_hint +
     "When providing the price, use EUR currency."
 )
 
@@ -36,6 +61,7 @@ tools = [
             Only use SELECT statements to retrieve data.
             SQL should be written using this database schema:
             {database_schema_string}
+            {dialect_hint}{summary_hint}
             Never perform operations that modify data (DELETE, INSERT, UPDATE, DROP, ALTER).
         """,
         "parameters": {
@@ -71,7 +97,15 @@ tools = [
 
 
 def run_agent_conversation(messages):
-    """Handles model responses, optional tool calls, and final text reply."""
+    """Handles model responses, optional tool calls, and final text reply.
+
+    Concurrent sessions with the same conversation share one model call.
+    """
+    key = json.dumps([[m["role"], " ".join(m["content"].split())] for m in messages], ensure_ascii=False)
+    return agent_flight.do(key, _run_agent_conversation, messages)
+
+
+def _run_agent_conversation(messages):
     try:
         # First model pass (may include tool calls)
         response = client.responses.create(
@@ -6,6 +6,7 @@ import streamlit as st
 from google import genai
 from google.genai import types
 from utils.logger_helper import get_logger
+from utils.singleflight_helper import get_flight
 from pydub import AudioSegment
 
 # ===========================
@@ -28,6 +29,9 @@ logger.info(f"Using models: ASR={ASR_MODEL}, TEXT={TEXT_MODEL}, IMAGE={IMAGE_MOD
 client = genai.Client(api_key=API_KEY)
 logger.info("Gemini client initialized.")
 
+# Concurrent sessions sending identical requests share one Gemini call
+gemini_flight = get_flight("gemini")
+
 # ===========================
 # UI
 # ===========================
@@ -122,7 +126,9 @@ if audio_data is not None:
     logger.info("Starting ASR transcription...")
     with st.spinner("Transcribing speech..."):
         try:
-            asr_resp = client.models.generate_content(
+            asr_resp = gemini_flight.do(
+                (ASR_MODEL, audio_hash),
+                client.models.generate_content,
                 model=ASR_MODEL,
                 config=types.GenerateContentConfig(
                     system_instruction="Transcribe this audio clearly."
@@ -145,7 +151,9 @@ if audio_data is not None:
 
     with st.spinner("Rewriting into an image prompt..."):
         try:
-            rewrite_resp = client.models.generate_content(
+            rewrite_resp = gemini_flight.do(
+                (TEXT_MODEL, " ".join(transcription.split())),
+                client.models.generate_content,
                 model=TEXT_MODEL,
                 config=types.GenerateContentConfig(
                     system_instruction="Rewrite the following user request into a single, detailed image-generation prompt suitable for an image model. Keep it short."
@@ -170,7 +178,12 @@ if audio_data is not None:
         image_bytes = None
 
         try:
-            img_resp = client.models.generate_content(model=IMAGE_MODEL, contents=[rewritten_prompt])
+            img_resp = gemini_flight.do(
+                (IMAGE_MODEL, " ".join(rewritten_prompt.split())),
+                client.models.generate_content,
+                model=IMAGE_MODEL,
+                contents=[rewritten_prompt],
+            )
             logger.debug(f"Image model response: {img_resp}")
 
             for p in img_resp.parts:
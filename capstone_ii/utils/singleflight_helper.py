@@ -0,0 +1,82 @@
+"""
+Process-wide request coalescing ("single flight").
+
+Streamlit runs every session in its own thread of the same process, so when
+many users ask the same thing at once each session would issue its own
+identical database or model call. A `SingleFlight` group lets concurrent
+callers with the same key share one in-flight call: the first caller runs it,
+the others wait for its result (or exception).
+
+Usage:
+    from utils.singleflight_helper import get_flight
+    gemini_flight = get_flight("gemini")
+    resp = gemini_flight.do((TEXT_MODEL, prompt), client.models.generate_content,
+                            model=TEXT_MODEL, contents=[prompt])
+"""
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable
+
+from utils.logger_helper import get_logger
+
+logger = get_logger("singleflight_helper")
+
+_groups: Dict[str, "SingleFlight"] = {}
+_groups_lock = threading.Lock()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run `fn(*args, **kwargs)` unless a call with the same key is already in flight."""
+        with self._lock:
+            self.calls += 1
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            logger.info("[%s] coalesced call (%s of %s so far)", self.name, self.coalesced, self.calls)
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+
+def get_flight(name: str) -> SingleFlight:
+    """Return the process-wide group called `name`, creating it on first use.
+
+    Streamlit re-executes the app script on every rerun, so groups must be
+    looked up here rather than created at script level.
+    """
+    with _groups_lock:
+        if name not in _groups:
+            _groups[name] = SingleFlight(name)
+        return _groups[name]
+
+
+def get_singleflight_stats() -> Dict[str, Dict[str, int]]:
+    """Return call and coalesced counts for every single-flight group in this process."""
+    with _groups_lock:
+        groups = list(_groups.items())
+    return {name: {"calls": group.calls, "coalesced": group.coalesced} for name, group in groups}
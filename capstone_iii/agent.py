@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 import requests
@@ -10,27 +11,44 @@ from langchain.tools import tool
 from langchain_openai import OpenAIEmbeddings
 from langchain.chat_models import init_chat_model
 
+from context_packer import pack_context
+from utils.singleflight_helper import get_flight
+
 
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 REPO = os.getenv("REPO")  
+RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "4"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "500"))
 
 model = init_chat_model("gpt-4.1")
 
-embeddings = OpenAIEmbeddings(model="text-embedding-3-large")
+embedding_flight = get_flight("embed_query")
+retrieval_flight = get_flight("retrieve_context")
+agent_flight = get_flight("agent")
+
+
+class SingleFlightEmbeddings(OpenAIEmbeddings):
+    """OpenAI embeddings where concurrent identical queries share one API call."""
+
+    def embed_query(self, text: str, **kwargs) -> list[float]:
+        text = text.strip()
+        key = (self.model, text, repr(sorted(kwargs.items())))
+        return embedding_flight.do(key, super().embed_query, text, **kwargs)
+
+
+embeddings = SingleFlightEmbeddings(model="text-embedding-3-large")
 faiss_index = FAISS.load_local("faiss_index", embeddings, allow_dangerous_deserialization=True)
 
 @tool(response_format="content_and_artifact")
 def retrieve_context(query: str):
     """Retrieve information to help answer a query."""
-    retrieved_docs = faiss_index.similarity_search(query, k=2)
-    serialized = "\n\n".join(
-        (
-            f"Source: {doc.metadata.get('source', 'unknown')}, "
-            f"Page: {doc.metadata.get('page', 'unknown')}\n"
-            f"Content: {doc.page_content}"
-        )
-        for doc in retrieved_docs
-    )
+    return retrieval_flight.do(" ".join(query.split()), _retrieve_context, query)
+
+
+def _retrieve_context(query):
+    hits = faiss_index.similarity_search_with_score(query, k=RETRIEVAL_K)
+    serialized = pack_context(hits, CONTEXT_TOKEN_BUDGET)
+    retrieved_docs = [doc for doc, _ in hits]
     return serialized, retrieved_docs
 
 @tool()
@@ -71,4 +89,10 @@ prompt = (
     "Once the user provides their email, file the ticket and confirm."
 )
 
-agent = create_agent(model, tools, system_prompt=prompt)
\ No newline at end of file
+agent = create_agent(model, tools, system_prompt=prompt)
+
+
+def run_agent(messages):
+    """Invoke the agent; concurrent sessions with the same conversation share one run."""
+    key = json.dumps([[m["role"], " ".join(m["content"].split())] for m in messages], ensure_ascii=False)
+    return agent_flight.do(key, agent.invoke, {"messages": messages})
@@ -4,7 +4,7 @@ load_dotenv()
 from langchain_openai import OpenAI
 import streamlit as st
 
-from agent import agent
+from agent import run_agent
 
 st.set_page_config(
     page_title="RAG with Github Issues Integration",
@@ -43,7 +43,7 @@ if prompt := st.chat_input("Type your message..."):
         with st.container():
             with st.spinner("Thinking..."):
                     # Pass the full message history to the agent
-                    result = agent.invoke({"messages": st.session_state.messages})
+                    result = run_agent(st.session_state.messages)
 
                     # If result is a list of messages, get the last AI message's content
                     if hasattr(result, "content"):
@@ -0,0 +1,212 @@
+import re
+
+import tiktoken
+from utils.logger_helper import get_logger
+
+logger = get_logger("context_packer")
+
+# gpt-4.1 tokenizer
+encoding = tiktoken.get_encoding("o200k_base")
+
+MIN_OVERLAP = 50      # characters two chunks must share to be merged
+SHINGLE_SIZE = 8      # words per shingle for near-duplicate detection
+DUPLICATE_RATIO = 0.8 # share of already-seen shingles that makes a line a duplicate
+MIN_TAIL_TOKENS = 50  # don't bother adding a truncated passage shorter than this
+
+
+def count_tokens(text):
+    return len(encoding.encode(text))
+
+
+def format_passage(source, page, content):
+    return f"Source: {source}, Page: {page}\nContent: {content}"
+
+
+def _merge_text(a, b):
+    """Merge two chunks if one contains the other or they overlap end-to-start."""
+    if b in a:
+        return a
+    if a in b:
+        return b
+    for first, second in ((a, b), (b, a)):
+        idx = first.find(second[:MIN_OVERLAP])
+        while idx != -1:
+            if second.startswith(first[idx:]):
+                return first + second[len(first) - idx:]
+            idx = first.find(second[:MIN_OVERLAP], idx + 1)
+    return None
+
+
+def merge_chunks(hits):
+    """Merge overlapping chunks of the same source/page.
+
+    `hits` is a list of (Document, distance) pairs. Every passage keeps the
+    `(start, end, distance)` span of each of its chunks inside the merged text,
+    so packing can still rank and cut per chunk.
+    """
+    passages = []
+    for doc, score in hits:
+        source = doc.metadata.get("source", "unknown")
+        page = doc.metadata.get("page", "unknown")
+        passage = {
+            "source": source,
+            "page": page,
+            "content": doc.page_content,
+            "spans": [(0, len(doc.page_content), score)],
+        }
+
+        merged = True
+        while merged:
+            merged = False
+            for other in passages:
+                if (other["source"], other["page"]) != (source, page):
+                    continue
+                text = _merge_text(other["content"], passage["content"])
+                if text is None:
+                    continue
+                spans = []
+                for part in (other, passage):
+                    offset = text.find(part["content"])
+                    spans += [(start + offset, end + offset, s) for start, end, s in part["spans"]]
+                passages.remove(other)
+                passage = {**passage, "content": text, "spans": spans}
+                merged = True
+                break
+        passages.append(passage)
+    return passages
+
+
+def _union(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _uncovered(start, end, intervals):
+    """First part of [start, end) not covered by `intervals`, or None."""
+    for covered_start, covered_end in _union(intervals):
+        if covered_end <= start or covered_start >= end:
+            continue
+        if covered_start > start:
+            return start, covered_start
+        start = covered_end
+    return (start, end) if start < end else None
+
+
+def _render(passage, intervals):
+    """Selected parts of a passage in document order, gaps marked with an ellipsis."""
+    return "\n…\n".join(passage["content"][start:end] for start, end in _union(intervals))
+
+
+def _cost(passages, selected):
+    return count_tokens("\n\n".join(
+        format_passage(passages[i]["source"], passages[i]["page"], _render(passages[i], intervals))
+        for i, intervals in selected.items()
+    ))
+
+
+def select_spans(passages, token_budget):
+    """Pick chunk spans best score first until `token_budget` is used up.
+
+    Text shared with an already selected chunk is not paid for twice. A chunk
+    that does not fit is cut to the remaining room; lower ranked chunks that
+    still fit are added afterwards. Returns {passage index: [(start, end)]}.
+    """
+    chunks = sorted(
+        (score, i, start, end)
+        for i, passage in enumerate(passages)
+        for start, end, score in passage["spans"]
+    )
+    selected = {}
+    for score, i, start, end in chunks:
+        trial = {**selected, i: selected.get(i, []) + [(start, end)]}
+        if _cost(passages, trial) <= token_budget:
+            selected = trial
+            continue
+
+        part = _uncovered(start, end, selected.get(i, []))
+        if part is None:
+            continue
+        header = format_passage(passages[i]["source"], passages[i]["page"], "")
+        room = token_budget - _cost(passages, selected) - (0 if i in selected else count_tokens(header)) - 4
+        # The best chunk is always kept, however little room there is
+        if selected and room < MIN_TAIL_TOKENS:
+            continue
+        tokens = encoding.encode(passages[i]["content"][part[0]:part[1]])
+        while room > 0:
+            cut = len(encoding.decode(tokens[:room]))
+            trial = {**selected, i: selected.get(i, []) + [(part[0], part[0] + cut)]}
+            if _cost(passages, trial) <= token_budget:
+                selected = trial
+                break
+            room -= max(1, room // 10)
+    return selected
+
+
+def _shingles(words):
+    if len(words) < SHINGLE_SIZE:
+        return {tuple(words)}
+    return {tuple(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def drop_duplicate_spans(passages):
+    """Remove lines whose text already appeared (almost) verbatim in a better passage."""
+    seen = set()
+    kept = []
+    for passage in sorted(passages, key=lambda p: p["score"]):
+        lines = []
+        for line in passage["content"].splitlines():
+            words = re.findall(r"\w+", line.lower())
+            if not words:
+                if line.strip():
+                    lines.append(line)
+                continue
+            shingles = _shingles(words)
+            if len(shingles & seen) >= DUPLICATE_RATIO * len(shingles):
+                continue
+            seen |= shingles
+            lines.append(line)
+        if lines:
+            kept.append({**passage, "content": "\n".join(lines)})
+    return kept
+
+
+def pack_context(hits, token_budget):
+    """Assemble retrieved chunks into a deduplicated context within `token_budget` tokens.
+
+    Chunks are taken by score, so the best match survives any cut; the
+    Source/Page citation of every passage is kept intact.
+    """
+    raw_tokens = count_tokens("\n\n".join(
+        format_passage(doc.metadata.get("source", "unknown"), doc.metadata.get("page", "unknown"), doc.page_content)
+        for doc, _ in hits
+    ))
+
+    passages = merge_chunks(hits)
+    selected = select_spans(passages, token_budget)
+    if hits and not selected:
+        logger.warning("Context budget of %s tokens cannot fit even the best chunk", token_budget)
+
+    # `selected` is in order of each passage's best chunk, so that order is the rank
+    packed = [
+        {
+            "source": passages[i]["source"],
+            "page": passages[i]["page"],
+            "content": _render(passages[i], intervals),
+            "score": rank,
+        }
+        for rank, (i, intervals) in enumerate(selected.items())
+    ]
+    blocks = [
+        format_passage(passage["source"], passage["page"], passage["content"])
+        for passage in drop_duplicate_spans(packed)
+    ]
+
+    context = "\n\n".join(blocks)
+    logger.info("Packed context: %s tokens -> %s tokens (%s hits, %s passages)",
+                raw_tokens, count_tokens(context), len(hits), len(blocks))
+    return context